@@ -4,9 +4,12 @@ import time
 from os import environ as env
 
 # 3rd party imports
+import httpx
+import orjson
 from fastapi.logger import logger as fastapi_logger
 from fastapi.staticfiles import StaticFiles
-from fastapi import FastAPI, Query
+from fastapi.responses import ORJSONResponse
+from fastapi import FastAPI, Query, Response
 from fastapi.middleware.cors import CORSMiddleware
 
 # Local imports
@@ -53,7 +56,8 @@ app = FastAPI(
     debug=False, 
     openapi_tags=tags_metadata,
     openapi_url="/api/tribunal-justica-mg/consulta/docs/openapi.json",
-    docs_url='/api/tribunal-justica-mg/consulta/docs'
+    docs_url='/api/tribunal-justica-mg/consulta/docs',
+    default_response_class=ORJSONResponse
 )
 
 app.add_middleware(
@@ -63,6 +67,22 @@ app.add_middleware(
     allow_methods=['*'],
     allow_headers=['*'])
 
+#---------------------------- Lifecycle -------------------------------
+@app.on_event("startup")
+async def startup():
+    # Transporte compartilhado: reaproveita conexões TCP/TLS (keep-alive e HTTP/2) entre consultas.
+    # Cada consulta usa seu próprio cliente (e cookies), pois o PJe guarda a sessão JSF/Seam no cookie.
+    app.state.transport = httpx.AsyncHTTPTransport(
+        verify=False,
+        http2=True,
+        limits=httpx.Limits(max_keepalive_connections=20, max_connections=100, keepalive_expiry=30)
+    )
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    await app.state.transport.aclose()
+
 #---------------------------- Query params -------------------------------
 processo = Query(
     ..., 
@@ -71,11 +91,18 @@ processo = Query(
 #---------------------------- Endpoints -------------------------------
 @app.get(
     path="/api/tribunal-justica-mg/consulta", 
-    tags=['tribunal-justica-mg'])
+    tags=['tribunal-justica-mg'],
+    response_model=None,
+    response_class=ORJSONResponse)
 async def get_consulta(processo: str):
     str_time = time.time()
     telem = models.Telemetria(tentativas=1, tempo_total=str_time)
-    return await consulta.fetch(processo, telemetria=telem)
+    async with consulta.novo_cliente(app.state.transport) as client:
+        result = await consulta.fetch(processo, telemetria=telem, client=client)
+    if isinstance(result, Response):
+        return result
+    # Serializa direto com orjson, sem passar pelo jsonable_encoder em cada movimentação
+    return Response(content=orjson.dumps(result, default=lambda o: o.model_dump()), media_type=ORJSONResponse.media_type)
 
 
 #--------------------------- Static Files ------------------------------
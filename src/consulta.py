@@ -1,15 +1,21 @@
 from os import environ as env
+import asyncio
 from datetime import datetime
+import functools
+import io
 import time
-from typing import Union, List, Optional
+from typing import List, Optional
 import re
 from urllib.parse import urlencode, urlparse, urlunparse
 
 from fastapi.logger import logger
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse
 from fastapi import status
 from bs4 import BeautifulSoup
+from lxml import etree
+from selectolax.lexbor import LexborHTMLParser, LexborNode
 import httpx
+import xxhash
 
 # Local imports
 from src.models import Movimentacao, Telemetria, PoloAtivo, PoloPassivo, ResponseSite, ResponseDefault, ResponseError
@@ -17,6 +23,18 @@ from src.models import Movimentacao, Telemetria, PoloAtivo, PoloPassivo, Respons
 # Captura variáveis de ambiente e cria constantes
 TEMPO_LIMITE = int(env.get('TEMPO_LIMITE', 180))
 TENTATIVAS_MAXIMAS_RECURSIVAS = int(env.get('TENTATIVAS_MAXIMAS_RECURSIVAS', 30))
+CONCORRENCIA_PAGINACAO = int(env.get('TJMG_CONCURRENCY', 5))
+
+BASE_URL = "https://pje-consulta-publica.tjmg.jus.br"
+BASE_HEADERS = {
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7",
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/140.0.0.0 Safari/537.36 Edg/140.0.0.0",
+    "Origin": BASE_URL,
+    "Referer": f"{BASE_URL}/",
+}
+
+# Parser do BeautifulSoup (lxml, em C, é bem mais rápido que o html.parser puro Python)
+_PARSER = "lxml"
 
 _SPACE = re.compile(r"\s+")
 _ID_DOC = re.compile(r"(?:CPF|CNPJ)\s*:\s*([\d\./-]+)", re.IGNORECASE)
@@ -36,6 +54,40 @@ _ONCLICK_URL = re.compile(r"openPopUp\([^,]+,\s*'([^']+)'\)", re.IGNORECASE)
 
 _KEEP_DOC_ENDPOINT_SUBSTR = "documentoSemLoginHTML.seam"
 
+# Seletores CSS do cabeçalho do processo. ".name" já cobre ".name label" (o .name vem antes
+# do label em ordem de documento), então um único seletor basta para o rótulo.
+_SEL_PROPVIEW = ".propertyView"
+_SEL_NAME = ".name"
+_SEL_VALUE = ".value"
+
+# Linhas de movimentação (filhas diretas do tbody, com ao menos uma célula) e links de documento
+_SEL_MOV_ROWS = 'table[id*="processoEvento"] > tbody > tr:has(> td)'
+_SEL_DOC_LINKS = "a[href], a[onclick]"
+
+# Pesquisa rejeitada pelo servidor (view expirada ou erro 5xx) mesmo com um ViewState novo
+class _RespostaInesperada(Exception):
+    pass
+
+# Regexes usadas no fluxo de consulta (fetch)
+_PADRAO_PROCESSO = re.compile(r'^\d{7}-\d{2}\.\d{4}\.8\.13\.\d{4}$')
+_OPENPOPUP_DETALHE = re.compile(r"openPopUp\('Consulta pública','(.*?)'\)")
+_RESULTADOS = re.compile(r'(\d+)\s+resultados')
+_CONTAINER_ID = re.compile(r"'containerId':'([^']+)'")
+_ACTION_URL = re.compile(r"'actionUrl':'([^']+)'")
+_VIEWSTATE_CDATA_BYTES = re.compile(rb'<update id="javax\.faces\.ViewState"[^>]*>(?:<!\[CDATA\[)?([^<\]]+)')
+_PAGINA_ATUAL_BYTES = re.compile(rb'class="[^"]*\bcurrentPage\b[^"]*"[^>]*>\s*(\d+)\s*<')
+
+# Tabela para str.translate que descarta tudo que não for dígito decimal (equivale a \D do re).
+# Só o ASCII fica memorizado, para a tabela não crescer com entradas Unicode arbitrárias.
+class _TabelaNaoDigitos(dict):
+    def __missing__(self, codigo: int):
+        valor = codigo if chr(codigo).isdecimal() else None
+        if codigo < 128:
+            self[codigo] = valor
+        return valor
+
+_NON_DIGIT_TABLE = _TabelaNaoDigitos()
+
 # Limpa espaços em branco e caracteres indesejados
 def _clean(s: str) -> str:
     if not s:
@@ -45,8 +97,11 @@ def _clean(s: str) -> str:
 # Normaliza URLs removendo :443 redundante
 def _normalize_url(u: str) -> str:
     """Remove :443 redundante em https e normaliza."""
-    if not u:
-        return ""
+    return _normalize_url_cached(u) if u else ""
+
+# Memoiza a normalização: o mesmo prefixo de URL se repete em muitas movimentações
+@functools.lru_cache(maxsize=4096)
+def _normalize_url_cached(u: str) -> str:
     try:
         p = urlparse(u.strip())
         if p.scheme == "https" and p.netloc.endswith(":443"):
@@ -56,7 +111,7 @@ def _normalize_url(u: str) -> str:
         return u.strip()
 
 # Extrai links de documentos de uma célula da tabela
-def _extract_doc_links(td) -> str:
+def _extract_doc_links(td: Optional[LexborNode]) -> str:
     """
     Retorna links de documento da célula (se houver), deduplicados e normalizados.
     Lê tanto href quanto o onclick (openPopUp).
@@ -64,18 +119,22 @@ def _extract_doc_links(td) -> str:
     """
     if td is None:
         return ""
+    if td.css_first(_SEL_DOC_LINKS) is None:
+        # Caso mais comum: célula só com texto, sem links a percorrer
+        return _clean(td.text(separator=" ", strip=True))
+
     links = []
     vistos = set()
 
-    for a in td.find_all("a"):
-        href = (a.get("href") or "").strip()
+    for a in td.css(_SEL_DOC_LINKS):
+        href = (a.attributes.get("href") or "").strip()
         if href and href != "#":
             u = _normalize_url(href)
             if u and _KEEP_DOC_ENDPOINT_SUBSTR in u and u not in vistos:
                 vistos.add(u)
                 links.append(u)
 
-        onclick = a.get("onclick") or ""
+        onclick = a.attributes.get("onclick") or ""
         m = _ONCLICK_URL.search(onclick)
         if m:
             u = _normalize_url(m.group(1))
@@ -84,73 +143,75 @@ def _extract_doc_links(td) -> str:
                 links.append(u)
 
     if not links:
-        return _clean(td.get_text(" ", strip=True))
+        return _clean(td.text(separator=" ", strip=True))
     return "; ".join(links)
 
 # Mapeia 'rótulo -> valor' dos blocos .propertyView, pegando a primeira ocorrência.
-def _props_por_rotulo_primeira_ocorrencia(soup: BeautifulSoup) -> dict:
+def _props_por_rotulo_primeira_ocorrencia(tree: LexborHTMLParser) -> dict:
     """
     Mapeia 'rótulo -> valor' dos blocos .propertyView, pegando a primeira ocorrência.
     """
     props = {}
-    for pv in soup.select(".propertyView"):
-        nome_el = pv.select_one(".name, .name label")
-        val_el  = pv.select_one(".value")
+    for pv in tree.css(_SEL_PROPVIEW):
+        nome_el = pv.css_first(_SEL_NAME)
+        val_el  = pv.css_first(_SEL_VALUE)
         if not nome_el or not val_el:
             continue
-        rotulo = _clean(nome_el.get_text(" ", strip=True))
+        rotulo = _clean(nome_el.text(separator=" ", strip=True))
         if not rotulo or rotulo in props:
             continue
-        valor = _clean(val_el.get_text(" ", strip=True))
+        valor = _clean(val_el.text(separator=" ", strip=True))
         props[rotulo] = valor
     return props
 
 # Retorna o <tbody> de dados (não cabeçalho). PJe costuma usar id terminando em ':tb'.
-def _tbody_dados(table: BeautifulSoup) -> Optional[BeautifulSoup]:
+def _tbody_dados(table: Optional[LexborNode]) -> Optional[LexborNode]:
     """
     Retorna o <tbody> de dados (não cabeçalho). PJe costuma usar id terminando em ':tb'.
     """
     if not table:
         return None
-    tb = table.find("tbody", id=lambda v: v and v.endswith(":tb"))
+    tb = table.css_first('tbody[id$=":tb"]')
     if tb:
         return tb
-    for tb in table.find_all("tbody"):
-        if not tb.find("tr", class_=lambda c: c and "subheader" in c):
+    for tb in table.css("tbody"):
+        if not tb.css_first('tr[class*="subheader"]'):
             return tb
     return None
 
 # Lê TODAS as linhas de participantes do polo e retorna lista de objetos
-def _parse_participantes(tabela_id: str, soup: BeautifulSoup):
+def _parse_participantes(tabela_id: str, tree: LexborHTMLParser):
     """
     Lê TODAS as linhas de participantes do polo e retorna lista de objetos
     (PoloAtivo ou PoloPassivo) com nome, cpf_cnpj e tipo.
     Ignora cabeçalhos e linhas vazias.
     """
-    table = soup.find("table", id=tabela_id)
+    table = tree.css_first(f'table[id="{tabela_id}"]')
     if not table:
         return []
 
-    tbody = _tbody_dados(table) or table.find("tbody")
+    polo_cls = PoloAtivo if "PoloAtivo" in tabela_id else PoloPassivo
+
+    tbody = _tbody_dados(table) or table.css_first("tbody")
     if not tbody:
         return []
 
     resultado = []
-    for tr in tbody.find_all("tr", class_=lambda c: not c or "subheader" not in c):
-        tds = tr.find_all("td")
+    for tr in tbody.css('tr:not([class*="subheader"])'):
+        tds = tr.css("td")
         if not tds:
             continue
 
-        bloco = _clean(tds[0].get_text(" ", strip=True))
+        bloco = _clean(tds[0].text(separator=" ", strip=True))
         if not bloco:
             continue
 
         if bloco.lower().startswith("participante") and "situação" in bloco.lower():
             continue
 
-        bold = tds[0].find("span", class_="text-bold")
+        bold = tds[0].css_first("span.text-bold")
         if bold:
-            bloco = _clean(bold.get_text(" ", strip=True))
+            bloco = _clean(bold.text(separator=" ", strip=True))
 
         m = _PART_LINHA.match(bloco)
         if m:
@@ -168,67 +229,62 @@ def _parse_participantes(tabela_id: str, soup: BeautifulSoup):
         if not nome or nome.lower().startswith("participante"):
             continue
 
-        if "PoloAtivo" in tabela_id:
-            resultado.append(PoloAtivo(nome=nome, cpf_cnpj=doc, tipo=tipo))
-        else:
-            resultado.append(PoloPassivo(nome=nome, cpf_cnpj=doc, tipo=tipo))
+        # Valores já saneados por _clean: dispensa a validação do Pydantic
+        resultado.append(polo_cls.model_construct(nome=nome, cpf_cnpj=doc, tipo=tipo))
 
     return resultado
 
 # Lê TODAS as movimentações e retorna lista de objetos
-def _parse_todas_movimentacoes(soup: BeautifulSoup) -> List[Movimentacao]:
+def _parse_todas_movimentacoes(tree: LexborHTMLParser, vistos: Optional[set] = None) -> List[Movimentacao]:
     """
-    Varre todas as tabelas de movimentações (id contendo 'processoEvento') no HTML concatenado.
-    Deduplica por (data_hora, descricao, documentos).
+    Varre todas as tabelas de movimentações (id contendo 'processoEvento') de uma página.
+    Deduplica por um hash de 64 bits de (data_hora, descricao, documentos); passe
+    o mesmo `vistos` em chamadas sucessivas para deduplicar entre páginas.
     """
     movimentos: List[Movimentacao] = []
-    vistos = set()
+    if vistos is None:
+        vistos = set()
+
+    # Uma única consulta em C traz todas as linhas; as células são os <td> filhos diretos
+    for tr in tree.css(_SEL_MOV_ROWS):
+        tds = [c for c in tr.iter() if c.tag == "td"]
+
+        col1 = _clean(tds[0].text(separator=" ", strip=True))
+        data_hora, descricao = "", col1
+        if " - " in col1:
+            data_hora, descricao = [_clean(x) for x in col1.split(" - ", 1)]
 
-    tabelas = soup.find_all("table", id=lambda v: v and "processoEvento" in v)
-    for table in tabelas:
-        tbody = table.find("tbody")
-        if not tbody:
+        documentos = _extract_doc_links(tds[1]) if len(tds) > 1 else ""
+
+        # xxh3 de 64 bits: um int por movimentação no lugar de uma tupla de strings
+        chave = xxhash.xxh3_64_intdigest(f"{data_hora}\x1f{descricao}\x1f{documentos}".encode())
+        if chave in vistos:
             continue
-        for tr in tbody.find_all("tr"):
-            tds = tr.find_all("td")
-            if not tds:
-                continue
-
-            col1 = _clean(tds[0].get_text(" ", strip=True))
-            data_hora, descricao = "", col1
-            if " - " in col1:
-                data_hora, descricao = [_clean(x) for x in col1.split(" - ", 1)]
-
-            documentos = _extract_doc_links(tds[1]) if len(tds) > 1 else ""
-
-            chave = (data_hora, descricao, documentos)
-            if chave in vistos:
-                continue
-            vistos.add(chave)
-
-            movimentos.append(Movimentacao(
-                data_hora=data_hora,
-                descricao=descricao,
-                documentos=documentos
-            ))
+        vistos.add(chave)
+
+        # Valores já saneados por _clean: dispensa a validação do Pydantic
+        movimentos.append(Movimentacao.model_construct(
+            data_hora=data_hora,
+            descricao=descricao,
+            documentos=documentos
+        ))
     return movimentos
 
 
 # =========================
-# Função principal (HTML concatenado)
+# Função principal
 # =========================
 
-async def capturar_todas_informacoes(html_concat_ou_soup: Union[str, BeautifulSoup]) -> ResponseSite:
+async def capturar_todas_informacoes(tree: LexborHTMLParser, movimentacoes: List[Movimentacao]) -> ResponseSite:
     """
-    Recebe o HTML concatenado (todas as páginas) e retorna um ResponseSite completo:
+    Recebe a primeira página de detalhes já parseada e as movimentações de todas
+    as páginas, e retorna um ResponseSite completo:
       - Cabeçalho (Número, Data da Distribuição, Classe Judicial, Assunto, Jurisdição, Órgão Julgador)
-      - Polo Ativo (lista completa de participantes)
+      - Polo Ativo (lista completa de participantes; os polos não são paginados)
       - Polo Passivo (lista completa de participantes)
       - TODAS as movimentações (de todas as páginas), deduplicadas
     """
-    soup = html_concat_ou_soup if isinstance(html_concat_ou_soup, BeautifulSoup) else BeautifulSoup(html_concat_ou_soup, "html.parser")
-
-    props = _props_por_rotulo_primeira_ocorrencia(soup)
+    props = _props_por_rotulo_primeira_ocorrencia(tree)
     numero_processo   = props.get("Número Processo", "")
     data_distribuicao = props.get("Data da Distribuição", "")
     classe_judicial   = props.get("Classe Judicial", "")
@@ -237,11 +293,8 @@ async def capturar_todas_informacoes(html_concat_ou_soup: Union[str, BeautifulSo
     orgao_julgador    = props.get("Órgão Julgador", "")
 
     # Polos: listas completas
-    ativos   = _parse_participantes("j_id134:processoPartesPoloAtivoResumidoList", soup)
-    passivos = _parse_participantes("j_id134:processoPartesPoloPassivoResumidoList", soup)
-
-    # Movimentações
-    movimentacoes = _parse_todas_movimentacoes(soup)
+    ativos   = _parse_participantes("j_id134:processoPartesPoloAtivoResumidoList", tree)
+    passivos = _parse_participantes("j_id134:processoPartesPoloPassivoResumidoList", tree)
 
     return ResponseSite(
         numero_processo=numero_processo,
@@ -255,9 +308,10 @@ async def capturar_todas_informacoes(html_concat_ou_soup: Union[str, BeautifulSo
         movimentacoes=movimentacoes
     )
 
+@functools.lru_cache(maxsize=4096)
 def normalizar_numero_processo(valor: str) -> str:
     # Remove tudo que não for dígito
-    digitos = re.sub(r'\D', '', valor)
+    digitos = valor.translate(_NON_DIGIT_TABLE)
     if len(digitos) == 20:
         # Formata para o padrão CNJ: NNNNNNN-DD.AAAA.J.TR.OOOO
         return f"{digitos[:7]}-{digitos[7:9]}.{digitos[9:13]}.{digitos[13]}.{digitos[14:16]}.{digitos[16:20]}"
@@ -265,288 +319,371 @@ def normalizar_numero_processo(valor: str) -> str:
 
 
 
-async def fetch(numero_processo: str, telemetria: Telemetria) -> dict:
+# Estado da página inicial (ViewState, id do botão). Um único slot: a página é a mesma para
+# todas as consultas e os cookies da sessão JSF ficam no cliente HTTP compartilhado.
+# Indica se a pesquisa foi rejeitada pelo servidor (ViewState expirado ou inválido, erro interno)
+def _pesquisa_rejeitada(r: httpx.Response) -> bool:
     """
-    Consulta pública do TJMG (PJe): abre a página inicial, obtém ViewState,
-    envia o formulário via POST (AJAX JSF) e retorna as movimentações.
+    Só considera sinais explícitos: 5xx, cabeçalho Ajax-Expired (RichFaces 3 responde 200
+    com ele quando a view expirou) e ViewExpiredException no corpo.
     """
-    
-    import re
-    padrao_processo = r'^\d{7}-\d{2}\.\d{4}\.8\.13\.\d{4}$'
-    if not numero_processo or not isinstance(numero_processo, str) or not re.match(padrao_processo, numero_processo):
-        numero_processo = normalizar_numero_processo(numero_processo)
+    return r.status_code >= 500 or bool(r.headers.get("Ajax-Expired")) or b"ViewExpired" in r.content
 
-    if telemetria.tentativas >= TENTATIVAS_MAXIMAS_RECURSIVAS:
-        logger.error("Número máximo de tentativas recursivas atingido.")
-        return JSONResponse(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            content={'code': 3, 'message': 'ERRO_SERVIDOR_INTERNO'}
-        )
+# Abre a página inicial e obtém o estado do formulário de consulta
+async def _obter_estado_inicial(client: httpx.AsyncClient) -> tuple:
+    """
+    Abre a página inicial da consulta pública e retorna (ViewState, id do botão de pesquisa).
+    """
+    r0 = await client.get(BASE_URL, follow_redirects=True)
+    return _extrair_estado_inicial(r0.content)
 
-    inicio = time.time()
-    logger.info(f'fetch() TJMG iniciou. Processo: {numero_processo} - Tentativa {telemetria.tentativas}')
+# Lê ViewState e botão de pesquisa da página inicial em streaming, sem montar o DOM inteiro
+def _extrair_estado_inicial(content: bytes) -> tuple:
+    """
+    Percorre a página inicial com lxml iterparse e para assim que encontra o input
+    javax.faces.ViewState. Retorna (ViewState, id do botão).
+    """
+    viewstate_value = None
+    # O botão de pesquisa do formulário tem id fixo no PJe
+    action_id = "fPP:j_id236"
 
-    base = "https://pje-consulta-publica.tjmg.jus.br"
-    headers = {
-        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7",
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/140.0.0.0 Safari/537.36 Edg/140.0.0.0",
-        "Origin": base,
-        "Referer": f"{base}/",
+    try:
+        for _, el in etree.iterparse(io.BytesIO(content), events=("start",), html=True):
+            if el.tag == "input" and el.get("name") == "javax.faces.ViewState":
+                viewstate_value = el.get("value")
+                break
+    except etree.XMLSyntaxError as e:
+        # Página vazia ou truncada: segue com o que foi encontrado
+        logger.warning(f"Página inicial inválida: {e}")
+
+    return viewstate_value, action_id
+
+
+async def _consultar(numero_processo: str, client: httpx.AsyncClient) -> dict:
+    """
+    Executa uma tentativa da consulta: envia o formulário via POST (AJAX JSF),
+    abre os detalhes do processo, busca as demais páginas e extrai as informações.
+    Erros são propagados para fetch(), que decide se tenta novamente.
+    """
+    viewstate_value, action_id = await _obter_estado_inicial(client)
+
+    payload = {
+        "AJAXREQUEST": "_viewRoot",
+        "_viewRoot": "",
+        "fPP:numProcesso-inputNumeroProcessoDecoration:numProcesso-inputNumeroProcesso": numero_processo,
+        "inputNumeroProcesso": "",  
+        "mascaraProcessoReferenciaRadio": "on",
+        "fPP:j_id150:processoReferenciaInput": "",
+        "fPP:dnp:nomeParte": "",
+        "fPP:j_id168:nomeSocial": "",
+        "fPP:j_id177:alcunha": "",
+        "fPP:j_id186:nomeAdv": "",
+        "fPP:j_id195:classeProcessualProcessoHidden": "",
+        "tipoMascaraDocumento": "on",
+        "fPP:dpDec:documentoParte": "",
+        "fPP:Decoration:numeroOAB": "",
+        "fPP:Decoration:j_id230": "",
+        "fPP:Decoration:estadoComboOAB": "org.jboss.seam.ui.NoSelectionConverter.noSelectionValue",
+        "fPP": "fPP",
+        "autoScroll": "",
+        "javax.faces.ViewState": viewstate_value or "",
+        "fPP:j_id236": action_id,  
+        "AJAX:EVENTS_COUNT": "1",
     }
 
-    results = None
+    body_encoded = urlencode(payload)
+    headers_post = {
+        "Content-Type": "application/x-www-form-urlencoded; charset=UTF-8",
+    }
+    url_post = f"{BASE_URL}/pje/ConsultaPublica/listView.seam"
 
-    async with httpx.AsyncClient(timeout=TEMPO_LIMITE, verify=False, headers=headers) as client:
-        try:
-            
-            
-            r0 = await client.get(base, follow_redirects=True)
-            soup0 = BeautifulSoup(r0.content, "html.parser")
-
-            viewstate_input = soup0.find("input", {"name": "javax.faces.ViewState"})
-            viewstate_value = viewstate_input["value"] if viewstate_input and viewstate_input.has_attr("value") else None
-
-            action_el = soup0.find(id="fPP:j_id236")
-            action_id = action_el["id"] if action_el and action_el.has_attr("id") else "fPP:j_id236"
-
-            payload = {
-                "AJAXREQUEST": "_viewRoot",
-                "_viewRoot": "",
-                "fPP:numProcesso-inputNumeroProcessoDecoration:numProcesso-inputNumeroProcesso": numero_processo,
-                "inputNumeroProcesso": "",  
-                "mascaraProcessoReferenciaRadio": "on",
-                "fPP:j_id150:processoReferenciaInput": "",
-                "fPP:dnp:nomeParte": "",
-                "fPP:j_id168:nomeSocial": "",
-                "fPP:j_id177:alcunha": "",
-                "fPP:j_id186:nomeAdv": "",
-                "fPP:j_id195:classeProcessualProcessoHidden": "",
-                "tipoMascaraDocumento": "on",
-                "fPP:dpDec:documentoParte": "",
-                "fPP:Decoration:numeroOAB": "",
-                "fPP:Decoration:j_id230": "",
-                "fPP:Decoration:estadoComboOAB": "org.jboss.seam.ui.NoSelectionConverter.noSelectionValue",
-                "fPP": "fPP",
-                "autoScroll": "",
-                "javax.faces.ViewState": viewstate_value or "",
-                "fPP:j_id236": action_id,  
-                "AJAX:EVENTS_COUNT": "1",
-            }
+    r1 = await client.post(url_post, data=body_encoded, headers=headers_post, follow_redirects=True)
 
-            body_encoded = urlencode(payload)
-            headers_post = headers | {
-                "Content-Type": "application/x-www-form-urlencoded; charset=UTF-8",
-            }
-            url_post = f"{base}/pje/ConsultaPublica/listView.seam"
+    if _pesquisa_rejeitada(r1):
+        # ViewState não foi aceito: abre a página inicial de novo e repete o POST uma vez
+        logger.info("ViewState da página inicial expirou, obtendo um novo")
+        viewstate_value, action_id = await _obter_estado_inicial(client)
+        payload["javax.faces.ViewState"] = viewstate_value or ""
+        payload["fPP:j_id236"] = action_id
+        r1 = await client.post(url_post, data=urlencode(payload), headers=headers_post, follow_redirects=True)
 
-            r1 = await client.post(url_post, data=body_encoded, headers=headers_post, follow_redirects=True)
+        if _pesquisa_rejeitada(r1):
+            # Não reportar "nenhum processo" a partir de uma view expirada
+            raise _RespostaInesperada(f"Pesquisa rejeitada pelo servidor (status {r1.status_code})")
 
-            soup1 = BeautifulSoup(r1.content, "html.parser")
-            
-            if 'Ver detalhes do processo' in soup1.text:
-            
-                link_tag = soup1.find("a", {"title": "Ver Detalhes"})
-                detalhe_url = None
-                if link_tag and "onclick" in link_tag.attrs:
-                    import re
-                    match = re.search(r"openPopUp\('Consulta pública','(.*?)'\)", link_tag["onclick"])
-                    if match:
-                        detalhe_url = f"{base}{match.group(1)}"
-                        
-                        
-                logger.info(f"Acessando página de detalhes: {detalhe_url}")
-                resp_processo = await client.get(detalhe_url, headers=headers, follow_redirects=True)
-
-                for cookie_name, cookie_value in resp_processo.cookies.items():
-                    logger.info(f"Cookie recebido: {cookie_name}")
-
-                soup_primeira_pagina = BeautifulSoup(resp_processo.content, "html.parser")
-                html_paginas = [str(soup_primeira_pagina)]  
-                soup_processo = soup_primeira_pagina  
-
-                total_paginas = 1
-                page_field_name = None
-                pagination_form_id = None
-                ajax_container = None
-                view_state = None
-                
-                total_span = soup_processo.find('span', {'class': 'pull-right text-muted'})
-                if total_span:
-                    match = re.search(r'(\d+)\s+resultados', total_span.text)
-                    if match:
-                        total_resultados = int(match.group(1))
-                        total_paginas = (total_resultados + 14) // 15
-                        logger.info(f"Total de resultados: {total_resultados}, páginas: {total_paginas}")
-                
-                slider_table = soup_processo.find('table', {'class': 'rich-inslider'})
-                if slider_table:
-                    page_field_name = slider_table.get('id')
-                    
-                    form = slider_table.find_parent('form')
-                    if form:
-                        pagination_form_id = form.get('id')
-                        
-                        action = form.get('action', '')
-                        container_match = re.search(r"'containerId':'([^']+)'", action)
-                        if container_match:
-                            ajax_container = container_match.group(1)
-                    
-                    right_num = slider_table.select_one('td.rich-inslider-right-num')
-                    if right_num and right_num.text.strip().isdigit():
-                        total_paginas = int(right_num.text.strip())
+    soup1 = BeautifulSoup(r1.content, _PARSER)
+    
+    if 'Ver detalhes do processo' in soup1.text:
+    
+        link_tag = soup1.find("a", {"title": "Ver Detalhes"})
+        detalhe_url = None
+        if link_tag and "onclick" in link_tag.attrs:
+            match = _OPENPOPUP_DETALHE.search(link_tag["onclick"])
+            if match:
+                detalhe_url = f"{BASE_URL}{match.group(1)}"
                 
-                viewstate_input = soup_processo.find('input', {'name': 'javax.faces.ViewState'})
-                if viewstate_input and viewstate_input.has_attr('value'):
-                    view_state = viewstate_input['value']
                 
-                logger.info(f"Total de páginas: {total_paginas}, Campo de paginação: {page_field_name}")
+        logger.info(f"Acessando página de detalhes: {detalhe_url}")
+        resp_processo = await client.get(detalhe_url, follow_redirects=True)
+
+        for cookie_name, cookie_value in resp_processo.cookies.items():
+            logger.info(f"Cookie recebido: {cookie_name}")
+
+        primeira_pagina = LexborHTMLParser(resp_processo.content)
+
+        # Dedup compartilhado entre todas as páginas de movimentações
+        vistos = set()
+        movimentacoes = _parse_todas_movimentacoes(primeira_pagina, vistos)
+
+        total_paginas = 1
+        page_field_name = None
+        pagination_form_id = None
+        pagination_form_action = ''
+        ajax_container = None
+        view_state = None
+        
+        total_span = primeira_pagina.css_first('span.pull-right.text-muted')
+        if total_span:
+            match = _RESULTADOS.search(total_span.text())
+            if match:
+                total_resultados = int(match.group(1))
+                total_paginas = (total_resultados + 14) // 15
+                logger.info(f"Total de resultados: {total_resultados}, páginas: {total_paginas}")
+        
+        slider_table = primeira_pagina.css_first('table.rich-inslider')
+        if slider_table:
+            page_field_name = slider_table.attributes.get('id')
+            
+            form = slider_table.parent
+            while form is not None and form.tag != 'form':
+                form = form.parent
+            if form:
+                pagination_form_id = form.attributes.get('id')
+                pagination_form_action = form.attributes.get('action') or ''
                 
-                if total_paginas > 1 and page_field_name and pagination_form_id:
-                    logger.info(f"Iniciando paginação: {total_paginas} páginas identificadas")
-                    
-                    for pagina in range(2, total_paginas + 1):  
-                        logger.info(f"Preparando requisição para página {pagina}")
-                        
-                        hidden_inputs = {}
-                        for hidden in soup_processo.find_all('input', {'type': 'hidden'}):
-                            if hidden.has_attr('name') and hidden.has_attr('value'):
-                                hidden_inputs[hidden['name']] = hidden['value']
-                        
-                        payload_paginacao = {
-                            'AJAXREQUEST': ajax_container or 'j_id134:j_id458',
-                            'javax.faces.ViewState': view_state or hidden_inputs.get('javax.faces.ViewState') or 'j_id5',
-                            f'{pagination_form_id}': pagination_form_id,  
-                            f'{page_field_name}': str(pagina),            
-                            'autoScroll': '',
-                            'AJAX:EVENTS_COUNT': '1'
-                        }
-                    
-                        body_encoded_paginacao = urlencode(payload_paginacao)
-                        
-                        url_post = detalhe_url
-                        
-                        form_action = soup_processo.find('form', {'id': pagination_form_id})
-                        if form_action:
-                            action_url_match = re.search(r"'actionUrl':'([^']+)'", form_action.get('action', ''))
-                            if action_url_match:
-                                url_post = f"{base}{action_url_match.group(1)}"
-                        
-                        if not url_post or 'DetalheProcessoConsultaPublica' not in url_post:
-                            url_post = f"{base}/pje/ConsultaPublica/DetalheProcessoConsultaPublica/listView.seam"
-                            logger.info(f"URL ajustada para: {url_post}")
-                        
-                        headers_post = headers | {
-                            "Content-Type": "application/x-www-form-urlencoded; charset=UTF-8",
-                            "Referer": detalhe_url,
-                            "X-Requested-With": "XMLHttpRequest",  
-                            "Accept": "application/xml, text/xml, */*; q=0.01",  
-                            "Faces-Request": "partial/ajax"  
-                        }
-                        
-                        try:
+                container_match = _CONTAINER_ID.search(pagination_form_action)
+                if container_match:
+                    ajax_container = container_match.group(1)
+            
+            right_num = slider_table.css_first('td.rich-inslider-right-num')
+            if right_num and right_num.text(strip=True).isdigit():
+                total_paginas = int(right_num.text(strip=True))
+        
+        viewstate_input = primeira_pagina.css_first('input[name="javax.faces.ViewState"][value]')
+        if viewstate_input:
+            view_state = viewstate_input.attributes.get('value')
+        
+        logger.info(f"Total de páginas: {total_paginas}, Campo de paginação: {page_field_name}")
+        
+        if total_paginas > 1 and page_field_name and pagination_form_id:
+            logger.info(f"Iniciando paginação: {total_paginas} páginas identificadas")
+
+            # ViewState estável da primeira página de detalhes, compartilhado por todas as páginas
+            view_state = view_state or 'j_id5'
+
+            url_post = detalhe_url
+
+            action_url_match = _ACTION_URL.search(pagination_form_action)
+            if action_url_match:
+                url_post = f"{BASE_URL}{action_url_match.group(1)}"
+
+            if not url_post or 'DetalheProcessoConsultaPublica' not in url_post:
+                url_post = f"{BASE_URL}/pje/ConsultaPublica/DetalheProcessoConsultaPublica/listView.seam"
+                logger.info(f"URL ajustada para: {url_post}")
+
+            headers_post = {
+                "Content-Type": "application/x-www-form-urlencoded; charset=UTF-8",
+                "Referer": detalhe_url,
+                "X-Requested-With": "XMLHttpRequest",  
+                "Accept": "application/xml, text/xml, */*; q=0.01",  
+                "Faces-Request": "partial/ajax"  
+            }
+
+            sem = asyncio.Semaphore(CONCORRENCIA_PAGINACAO)
+
+            # Campos fixos do POST de paginação, codificados uma vez; por página variam só a página e o ViewState
+            body_fixo_paginacao = urlencode([
+                ('AJAXREQUEST', ajax_container or 'j_id134:j_id458'),
+                (pagination_form_id, pagination_form_id),
+                ('autoScroll', ''),
+                ('AJAX:EVENTS_COUNT', '1'),
+            ])
+
+            async def buscar_pagina(pagina: int, view_state: str) -> Optional[bytes]:
+                """
+                Busca uma página de movimentações (POST AJAX JSF, com fallback GET
+                quando o PJe responde XML parcial). Retorna os bytes HTML da página ou None
+                se a view expirou, a página veio sem movimentações ou não é a pedida.
+                """
+                async with sem:
+                    try:
+                        # Requisições concorrentes compartilham a mesma view: se o servidor
+                        # devolver outra página, tenta mais uma vez antes de desistir
+                        for tentativa in range(2):
+                            body_encoded_paginacao = f"{body_fixo_paginacao}&" + urlencode([
+                                (page_field_name, str(pagina)),
+                                ('javax.faces.ViewState', view_state),
+                            ])
                             logger.info(f"Buscando página {pagina} de {total_paginas}")
                             logger.info(f"URL: {url_post}")
-                            
+
                             resp = await client.post(url_post, data=body_encoded_paginacao, headers=headers_post, follow_redirects=True)
                             logger.info(f"Status da resposta: {resp.status_code}")
-                            
+
                             if resp.status_code == 200:
-                                logger.info(f"Primeiros 300 caracteres da resposta: {resp.text[:300]}")
-                                
-                                if resp.text.startswith('<?xml'):
+                                logger.info(f"Primeiros 300 bytes da resposta: {resp.content[:300]!r}")
+
+                                if resp.content.startswith(b'<?xml'):
                                     logger.info("Recebemos uma resposta XML parcial, extraindo informações relevantes")
-                                    
-                                    try:
-                                        xml_soup = BeautifulSoup(resp.text, "html.parser")  # Use html.parser para XML também
-                                        
-                                        new_viewstate = xml_soup.find('update', {'id': 'javax.faces.ViewState'})
-                                        if new_viewstate and new_viewstate.text:
-                                            view_state = new_viewstate.text.strip()
-                                            logger.info(f"Novo ViewState extraído do XML (método 1): {view_state}")
-                                        
-                                        if not view_state:
-                                            vs_match = re.search(r'<update id="javax.faces.ViewState"><!\[CDATA\[([^]]+)\]\]>', resp.text)
-                                            if vs_match:
-                                                view_state = vs_match.group(1)
-                                                logger.info(f"Novo ViewState extraído do XML (método 2): {view_state}")
-                                    except Exception as xml_error:
-                                        logger.error(f"Erro ao processar XML: {xml_error}")
-                                    
+
+                                    vs_match = _VIEWSTATE_CDATA_BYTES.search(resp.content)
+                                    if vs_match:
+                                        view_state = vs_match.group(1).decode().strip()
+                                        logger.info(f"Novo ViewState extraído do XML: {view_state}")
+
                                     new_url = detalhe_url
                                     if '?' in new_url:
                                         new_url = new_url.split('?')[0]
-                                    
+
                                     params = {
                                         'page': str(pagina),
                                         'javax.faces.ViewState': view_state
                                     }
                                     new_url = f"{new_url}?{urlencode(params)}"
-                                    
+
                                     logger.info(f"Fazendo GET para URL atualizada: {new_url}")
-                                    resp = await client.get(new_url, headers=headers, follow_redirects=True)
-                                
-                            soup_processo = BeautifulSoup(resp.content, "html.parser")
-                            html_paginas.append(str(soup_processo))  
-                            
-                            if pagina > 2:
-                                current_page_indicator = soup_processo.find('span', {'class': 'currentPage'})
-                                if current_page_indicator:
-                                    logger.info(f"Página atual: {current_page_indicator.text.strip()}")
-                                else:
-                                    logger.warning("Não foi possível identificar o indicador de página atual")
-                            viewstate_input = soup_processo.find('input', {'name': 'javax.faces.ViewState'})
-                            if viewstate_input and viewstate_input.has_attr('value'):
-                                view_state = viewstate_input['value']
-                                logger.info(f"ViewState atualizado: {view_state}")
-                        
-                        except Exception as e:
-                            logger.error(f"Erro ao buscar página {pagina}: {str(e)}")
-                            import traceback
-                            logger.error(traceback.format_exc())
-                            continue
-                
+                                    resp = await client.get(new_url, follow_redirects=True)
+
+                            # View expirada ou erro do servidor não é uma página vazia
+                            if resp.status_code != 200 or _pesquisa_rejeitada(resp):
+                                logger.error(f"Página {pagina} rejeitada pelo servidor (status {resp.status_code})")
+                                return None
+                            if b"processoEvento" not in resp.content:
+                                logger.error(f"Página {pagina} veio sem a tabela de movimentações")
+                                return None
+
+                            pagina_match = _PAGINA_ATUAL_BYTES.search(resp.content)
+                            if pagina_match is None:
+                                logger.warning(f"Não foi possível identificar o indicador de página atual (página {pagina})")
+                                return resp.content
+                            if int(pagina_match.group(1)) == pagina:
+                                return resp.content
+                            logger.warning(f"Pedida a página {pagina}, recebida a {pagina_match.group(1)} (tentativa {tentativa + 1})")
+
+                        logger.error(f"Página {pagina} não pôde ser obtida: o servidor devolveu outra página")
+                        return None
+
+                    except Exception as e:
+                        logger.error(f"Erro ao buscar página {pagina}: {str(e)}")
+                        import traceback
+                        logger.error(traceback.format_exc())
+                        return None
+
+            html_bytes_pages = await asyncio.gather(*[buscar_pagina(p, view_state) for p in range(2, total_paginas + 1)])
+
+            # Parseia uma página por vez, na ordem, para manter a ordem e o dedup determinísticos
+            # sem segurar N árvores em memória
+            for conteudo in html_bytes_pages:
+                if conteudo is None:
+                    continue
+                pagina_processo = LexborHTMLParser(conteudo)
+                movimentacoes.extend(_parse_todas_movimentacoes(pagina_processo, vistos))
+
+            falhas = sum(1 for conteudo in html_bytes_pages if conteudo is None)
+            if falhas:
+                logger.error(f"{falhas} de {total_paginas - 1} páginas adicionais não foram obtidas; movimentações incompletas")
+
+        site: ResponseSite = await capturar_todas_informacoes(primeira_pagina, movimentacoes)
+        
+        results = {
+            'code': 0,
+            'message': 'Processo encontrado',
+            'datetime': str(datetime.now()),
+            'results': [site]
+        }
+        return results
 
-                html_todas = ''.join(html_paginas)
-                soup_todas_paginas = BeautifulSoup(html_todas, "html.parser")
+    return {
+        'code': 0,
+        'message': 'Nenhum processo encontrado',
+        'datetime': str(datetime.now()),
+        'results': []
+    }
 
-                site: ResponseSite = await capturar_todas_informacoes(soup_todas_paginas)
-                
-                results = {
-                    'code': 0,
-                    'message': 'Processo encontrado',
-                    'datetime': str(datetime.now()),
-                    'results': [site]
-                }
-                return results
-            else:
-                results = {
-                    'code': 0,
-                    'message': 'Nenhum processo encontrado',
-                    'datetime': str(datetime.now()),
-                    'results': []
-                }
+
+
+# Transporte compartilhado que não é fechado junto com o cliente de cada consulta
+class _TransporteCompartilhado(httpx.AsyncBaseTransport):
+    def __init__(self, transporte: httpx.AsyncBaseTransport):
+        self._transporte = transporte
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        return await self._transporte.handle_async_request(request)
+
+
+def novo_cliente(transporte: httpx.AsyncBaseTransport) -> httpx.AsyncClient:
+    """
+    Cria o cliente de uma consulta: cookies (sessão JSF/Seam) próprios, mas conexões
+    do pool do transporte compartilhado. Fechar o cliente não fecha o transporte.
+    """
+    return httpx.AsyncClient(
+        transport=_TransporteCompartilhado(transporte),
+        timeout=TEMPO_LIMITE,
+        headers=BASE_HEADERS,
+    )
+
+
+async def fetch(numero_processo: str, telemetria: Telemetria, client: httpx.AsyncClient) -> dict:
+    """
+    Consulta pública do TJMG (PJe): abre a página inicial, obtém ViewState,
+    envia o formulário via POST (AJAX JSF) e retorna as movimentações.
+    Usa um cliente por consulta (sessão própria) sobre o pool de conexões da aplicação
+    e repete a consulta com backoff exponencial em caso de falha de rede.
+    """
+    
+    if not numero_processo or not isinstance(numero_processo, str) or not _PADRAO_PROCESSO.match(numero_processo):
+        numero_processo = normalizar_numero_processo(numero_processo)
+
+    if telemetria.tentativas >= TENTATIVAS_MAXIMAS_RECURSIVAS:
+        logger.error("Número máximo de tentativas recursivas atingido.")
+        return ORJSONResponse(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            content={'code': 3, 'message': 'ERRO_SERVIDOR_INTERNO'}
+        )
+
+    results = None
+
+    # Tentativas em laço (sem recursão): o cliente e suas conexões keep-alive são mantidos entre elas
+    while True:
+        logger.info(f'fetch() TJMG iniciou. Processo: {numero_processo} - Tentativa {telemetria.tentativas}')
+        try:
+            results = await _consultar(numero_processo, client)
+            break
+        except httpx.TransportError as e:
+            # Falha de rede/timeout: transitória, repete com backoff exponencial.
+            # O tempo total de tentativas fica limitado a TEMPO_LIMITE.
+            logger.error(f"Erro de transporte: {e!r}")
+            espera = min(2 ** (telemetria.tentativas - 1), 30)
+            decorrido = time.time() - telemetria.tempo_total
+            if telemetria.tentativas >= TENTATIVAS_MAXIMAS_RECURSIVAS or decorrido + espera > TEMPO_LIMITE:
+                break
+            logger.info(f"Tentando novamente em {espera}s...")
+            await asyncio.sleep(espera)
+            telemetria.tentativas += 1
         except httpx.RequestError as e:
-            logger.error(f"Erro de requisição: {e}")
-            telemetria.tempo_total = round(time.time() - telemetria.tempo_total, 2)
-            results = JSONResponse(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                content={'code': 4, 'message': 'ERRO_SERVIDOR_INTERNO', 'telemetria': telemetria.dict()}
-            )
-        except Exception as e:
-            logger.error(f"Erro durante a consulta: {e}")
-            if telemetria.tentativas < TENTATIVAS_MAXIMAS_RECURSIVAS:
-                logger.info("Tentando novamente...")
-                telemetria.tentativas += 1
-                return await fetch(numero_processo, telemetria)
-            else:
-                telemetria.tempo_total = round(time.time() - telemetria.tempo_total, 2)
-                results = JSONResponse(
-                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                    content={'code': 4, 'message': 'ERRO_SERVIDOR_INTERNO', 'telemetria': telemetria.dict()}
-                )
-        finally:
-            telemetria.tempo_total = round(time.time() - telemetria.tempo_total, 2)
-            if results is not None and isinstance(results, dict) and "telemetria" not in results:
-                results["telemetria"] = telemetria.dict()
-        
-        return results
+            logger.error(f"Erro de requisição: {e!r}")
+            break
+        except Exception:
+            # Erros de parsing/programação são determinísticos: repetir não muda o resultado
+            logger.exception("Erro durante a consulta")
+            break
+
+    telemetria.tempo_total = round(time.time() - telemetria.tempo_total, 2)
+    if results is None:
+        return ORJSONResponse(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            content={'code': 4, 'message': 'ERRO_SERVIDOR_INTERNO', 'telemetria': telemetria.model_dump()}
+        )
+
+    results["telemetria"] = telemetria.model_dump()
+    return results
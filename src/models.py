@@ -1,18 +1,21 @@
 from enum import Enum
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 from typing import Optional, List
 
 class Movimentacao(BaseModel):
+    model_config = ConfigDict(frozen=True, extra='ignore')
     data_hora: str = ""
     descricao: str = ""
     documentos: str = ""
 
 class PoloAtivo(BaseModel):
+    model_config = ConfigDict(frozen=True, extra='ignore')
     nome: str = ""
     cpf_cnpj: str = ""
     tipo: str = ""
 
 class PoloPassivo(BaseModel):
+    model_config = ConfigDict(frozen=True, extra='ignore')
     nome: str = ""
     cpf_cnpj: str = ""
     tipo: str = ""